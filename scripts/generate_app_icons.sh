@@ -32,22 +32,56 @@ sizes=(
     "1024x1024"
 )
 
+# Rasterize the SVG once at full size; every other size is downsampled from it
+master="Cheffy/Resources/AppIcons/AppIcon-1024x1024.png"
+echo "📱 Generating 1024x1024 master icon..."
+convert -background transparent Cheffy/Resources/AppIcon.svg \
+    -resize "1024x1024" \
+    -gravity center \
+    -extent "1024x1024" \
+    -define png:compression-level=1 \
+    "$master"
+
+# Resize in parallel, at most one job per core
+max_jobs=$(sysctl -n hw.ncpu 2>/dev/null || nproc 2>/dev/null || echo 4)
+jobs_running=0
+
 # Generate each size
 for size in "${sizes[@]}"; do
+    if [ "$size" = "1024x1024" ]; then
+        continue
+    fi
+
     echo "📱 Generating ${size} icon..."
     
     # Extract dimensions
     width=$(echo $size | cut -d'x' -f1)
     height=$(echo $size | cut -d'x' -f2)
     
-    # Convert SVG to PNG
-    convert Cheffy/Resources/AppIcon.svg \
+    # Downsample the master PNG
+    convert "$master" \
+        -filter Lanczos \
         -resize "${width}x${height}" \
-        -background transparent \
-        -gravity center \
-        -extent "${width}x${height}" \
-        "Cheffy/Resources/AppIcons/AppIcon-${size}.png"
+        -define png:compression-level=1 \
+        "Cheffy/Resources/AppIcons/AppIcon-${size}.png" &
+
+    jobs_running=$((jobs_running + 1))
+    if [ "$jobs_running" -ge "$max_jobs" ]; then
+        wait
+        jobs_running=0
+    fi
 done
+wait
+
+# Optionally recompress for release builds (Xcode re-encodes icons anyway)
+if [ -n "$CHEFFY_OXIPNG" ]; then
+    if command -v oxipng &> /dev/null; then
+        echo "🗜️  Optimizing icons with oxipng..."
+        oxipng -o 2 --strip safe Cheffy/Resources/AppIcons/AppIcon-*.png
+    else
+        echo "⚠️  CHEFFY_OXIPNG is set but oxipng is not installed (brew install oxipng)"
+    fi
+fi
 
 echo "✅ App icons generated successfully!"
 echo "📁 Icons saved to: Cheffy/Resources/AppIcons/"
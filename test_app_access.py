@@ -6,6 +6,8 @@ Test script to check App Store Connect API access and Xcode Cloud status
 import jwt
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 
 def generate_jwt_token(issuer_id, key_id, private_key_path):
@@ -45,11 +47,28 @@ def test_app_access():
         
         base_url = "https://api.appstoreconnect.apple.com/v1"
         
+        # Reuse pooled TLS connections for all probes
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        session.headers.update(headers)
+        
         print("🔍 Testing App Store Connect API access...")
         
+        # The probes are independent, so issue them concurrently
+        probe_urls = [
+            f"{base_url}/apps",
+            f"{base_url}/apps/{APP_ID}",
+            f"{base_url}/apps/{APP_ID}/ciWorkflows",
+            f"{base_url}/apps/{APP_ID}/ciBuildRuns",
+        ]
+        with ThreadPoolExecutor(max_workers=len(probe_urls)) as executor:
+            apps_probe, app_probe, workflows_probe, builds_probe = [
+                executor.submit(session.get, url) for url in probe_urls
+            ]
+        
         # 1. Test basic apps endpoint
         print("\n1. Testing apps endpoint...")
-        response = requests.get(f"{base_url}/apps", headers=headers)
+        response = apps_probe.result()
         if response.status_code == 200:
             apps = response.json().get('data', [])
             print(f"✅ Successfully accessed apps endpoint")
@@ -64,7 +83,7 @@ def test_app_access():
         
         # 2. Test specific app access
         print(f"\n2. Testing access to app {APP_ID}...")
-        response = requests.get(f"{base_url}/apps/{APP_ID}", headers=headers)
+        response = app_probe.result()
         if response.status_code == 200:
             app_data = response.json().get('data', {})
             app_name = app_data.get('attributes', {}).get('name', 'Unknown')
@@ -75,7 +94,7 @@ def test_app_access():
         
         # 3. Test Xcode Cloud workflows endpoint
         print(f"\n3. Testing Xcode Cloud workflows...")
-        response = requests.get(f"{base_url}/apps/{APP_ID}/ciWorkflows", headers=headers)
+        response = workflows_probe.result()
         if response.status_code == 200:
             workflows = response.json().get('data', [])
             print(f"✅ Successfully accessed Xcode Cloud workflows")
@@ -94,7 +113,7 @@ def test_app_access():
         
         # 4. Test builds endpoint
         print(f"\n4. Testing builds endpoint...")
-        response = requests.get(f"{base_url}/apps/{APP_ID}/ciBuildRuns", headers=headers)
+        response = builds_probe.result()
         if response.status_code == 200:
             builds = response.json().get('data', [])
             print(f"✅ Successfully accessed builds endpoint")
@@ -31,6 +31,13 @@ def test_dependencies():
         print("❌ cryptography not installed")
         return False
     
+    try:
+        import orjson
+        print("✅ orjson installed")
+    except ImportError:
+        print("❌ orjson not installed")
+        return False
+    
     return True
 
 def test_config_files():
@@ -43,9 +50,12 @@ def test_config_files():
         "requirements.txt"
     ]
     
+    # One directory listing instead of a stat per file
+    present = {entry.name for entry in os.scandir('.')}
+    
     missing_files = []
     for file in required_files:
-        if os.path.exists(file):
+        if file in present:
             print(f"✅ {file} exists")
         else:
             print(f"❌ {file} missing")
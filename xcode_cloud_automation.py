@@ -4,13 +4,29 @@ Xcode Cloud Automation Script for Cheffy App
 Uses App Store Connect API to manage Xcode Cloud workflows and builds
 """
 
-import jwt
+import base64
+import contextlib
+import functools
+import mmap
+import orjson
+import os
+import shutil
 import time
 import requests
 import json
-from datetime import datetime, timedelta
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional
 
+# Tokens are valid for 20 minutes, so reuse them across script runs
+TOKEN_CACHE_PATH = os.path.expanduser("~/.cache/cheffy/ascon_token.json")
+
+def _b64url(data: bytes) -> str:
+    """Unpadded base64url encoding, as used by JWT"""
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
 class XcodeCloudAutomation:
     def __init__(self, issuer_id: str, key_id: str, private_key_path: str, app_id: str):
         """
@@ -28,59 +44,107 @@ class XcodeCloudAutomation:
         self.app_id = app_id
         self.base_url = "https://api.appstoreconnect.apple.com/v1"
         self.token = None
-        self.token_expiry = None
+        self.token_expiry = None  # time.monotonic() deadline
+        
+        # The JWT header never changes, so encode it once
+        self._header_b64 = _b64url(json.dumps(
+            {'alg': 'ES256', 'kid': key_id, 'typ': 'JWT'}, separators=(',', ':')
+        ).encode())
+        
+        # Reuse TLS connections to App Store Connect across requests
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self.session.headers.update({'Content-Type': 'application/json'})
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _load_private_key(private_key_path: str) -> ec.EllipticCurvePrivateKey:
+        """Load and parse the .p8 private key, once per path"""
+        with open(private_key_path, 'rb') as f:
+            return serialization.load_pem_private_key(f.read(), password=None)
+    
+    def _load_cached_token(self) -> Optional[Dict]:
+        """Load a still-valid token for this key from the on-disk cache"""
+        try:
+            with open(TOKEN_CACHE_PATH, 'r') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Anything that isn't a well-formed entry is just a cache miss
+        if not isinstance(cached, dict) or not isinstance(cached.get('token'), str):
+            return None
+        if not isinstance(cached.get('exp'), (int, float)) or isinstance(cached['exp'], bool):
+            return None
+        if cached.get('iss') != self.issuer_id or cached.get('kid') != self.key_id:
+            return None
+        if cached.get('exp', 0) - time.time() <= 60:  # Refresh 1 min early
+            return None
+        return cached
+    
+    def _store_cached_token(self, token: str, exp: int):
+        """Atomically write the token to the on-disk cache (owner-only)"""
+        try:
+            os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+            tmp_path = f"{TOKEN_CACHE_PATH}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'iss': self.issuer_id, 'kid': self.key_id, 'token': token, 'exp': exp}, f)
+            os.replace(tmp_path, TOKEN_CACHE_PATH)
+        except OSError:
+            pass  # Caching is best-effort
     
     def _generate_jwt_token(self) -> str:
         """Generate JWT token for App Store Connect API authentication"""
-        if self.token and self.token_expiry and datetime.now() < self.token_expiry:
+        if self.token and self.token_expiry and time.monotonic() < self.token_expiry:
             return self.token
         
-        # Read private key
-        with open(self.private_key_path, 'r') as f:
-            private_key = f.read()
+        cached = self._load_cached_token()
+        if cached:
+            self.token = cached['token']
+            self.token_expiry = time.monotonic() + (cached['exp'] - 60 - time.time())
+            return self.token
+        
+        private_key = self._load_private_key(self.private_key_path)
         
         # Create JWT payload
+        now = int(time.time())
         payload = {
             'iss': self.issuer_id,
-            'iat': int(time.time()),
-            'exp': int(time.time()) + 1200,  # 20 minutes expiry
+            'iat': now,
+            'exp': now + 1200,  # 20 minutes expiry
             'aud': 'appstoreconnect-v1'
         }
         
-        # Generate JWT
-        self.token = jwt.encode(payload, private_key, algorithm='ES256', headers={
-            'kid': self.key_id,
-            'typ': 'JWT'
-        })
+        # Sign ES256 JWT; JWS wants the raw 64-byte r||s, not DER
+        payload_b64 = _b64url(json.dumps(payload, separators=(',', ':')).encode())
+        signing_input = f"{self._header_b64}.{payload_b64}".encode('ascii')
+        r, s = decode_dss_signature(private_key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        signature = r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+        self.token = f"{signing_input.decode('ascii')}.{_b64url(signature)}"
         
-        self.token_expiry = datetime.now() + timedelta(minutes=19)  # Refresh 1 min early
+        self.token_expiry = time.monotonic() + 19 * 60  # Refresh 1 min early
+        self._store_cached_token(self.token, payload['exp'])
         return self.token
     
     def _make_request(self, endpoint: str, method: str = 'GET', data: Dict = None) -> Dict:
         """Make authenticated request to App Store Connect API"""
         token = self._generate_jwt_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
+        headers = {'Authorization': f'Bearer {token}'}
         
         url = f"{self.base_url}{endpoint}"
         
-        if method == 'GET':
-            response = requests.get(url, headers=headers)
-        elif method == 'POST':
-            response = requests.post(url, headers=headers, json=data)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=headers)
-        else:
+        if method not in ('GET', 'POST', 'PATCH', 'DELETE'):
             raise ValueError(f"Unsupported method: {method}")
         
+        response = self.session.request(method, url, headers=headers, json=data)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     
     def list_workflows(self) -> List[Dict]:
         """List all Xcode Cloud workflows for the app"""
         endpoint = f"/apps/{self.app_id}/ciWorkflows"
+        endpoint += "?fields[ciWorkflows]=name&limit=200"
         response = self._make_request(endpoint)
         return response.get('data', [])
     
@@ -97,7 +161,7 @@ class XcodeCloudAutomation:
         else:
             endpoint = f"/apps/{self.app_id}/ciBuildRuns"
         
-        endpoint += f"?limit={limit}"
+        endpoint += f"?limit={limit}&fields[ciBuildRuns]=completionStatus,createdDate,executionProgress"
         response = self._make_request(endpoint)
         return response.get('data', [])
     
@@ -152,6 +216,7 @@ class XcodeCloudAutomation:
     def get_build_artifacts(self, build_id: str) -> List[Dict]:
         """Get artifacts for a build"""
         endpoint = f"/ciBuildRuns/{build_id}/artifacts"
+        endpoint += "?fields[ciArtifacts]=fileName,fileType,fileSize,downloadUrl"
         response = self._make_request(endpoint)
         return response.get('data', [])
     
@@ -161,12 +226,36 @@ class XcodeCloudAutomation:
         token = self._generate_jwt_token()
         headers = {'Authorization': f'Bearer {token}'}
         
-        response = requests.get(f"{self.base_url}{endpoint}", headers=headers, stream=True)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        with self.session.get(f"{self.base_url}{endpoint}", headers=headers, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            
+            # Content-Length is only the on-disk size when the body isn't encoded
+            total = int(response.headers.get('Content-Length', 0))
+            encoding = response.headers.get('Content-Encoding', 'identity')
+            
+            if total and encoding == 'identity':
+                # Fill the mapped output file in 1 MiB slices
+                with open(output_path, 'wb+') as f:
+                    try:
+                        f.truncate(total)
+                        with mmap.mmap(f.fileno(), total) as mm, memoryview(mm) as view:
+                            offset = 0
+                            while offset < total:
+                                with view[offset:offset + 1024 * 1024] as chunk:
+                                    n = response.raw.readinto(chunk)
+                                if not n:
+                                    raise IOError(f"Download truncated at {offset} of {total} bytes")
+                                offset += n
+                    except BaseException:
+                        # Don't leave a full-size, zero-padded file that looks complete
+                        f.close()
+                        with contextlib.suppress(FileNotFoundError):
+                            os.remove(output_path)
+                        raise
+            else:
+                with open(output_path, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, length=1024 * 1024)
 
 def main():
     """Example usage of Xcode Cloud automation"""